@@ -6,7 +6,9 @@ import shlex
 import sys
 from pathlib import Path
 
+from src.cache import ScrapeCache
 from src.parser import TaskParser
+from src.preview import write_task_preview
 from src.scraper import WebScraper
 from src.writer import ReportGenerator
 
@@ -18,13 +20,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_TRUTHY = frozenset({"1", "true", "t", "yes", "y", "on"})
+_FALSY = frozenset({"0", "false", "f", "no", "n", "off"})
+
 def _str_to_bool(value: str | bool) -> bool:
     if isinstance(value, bool):
         return value
     lowered = value.strip().lower()
-    if lowered in ("1", "true", "t", "yes", "y", "on"):
+    if lowered in _TRUTHY:
         return True
-    if lowered in ("0", "false", "f", "no", "n", "off"):
+    if lowered in _FALSY:
         return False
     raise argparse.ArgumentTypeError("boolean value expected")
 
@@ -63,6 +68,10 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--output-file", default=env_output, help="Path for generated DOCX report")
     parser.add_argument("--use-local-llm", type=_str_to_bool, default=_env_bool("USE_LOCAL_LLM", False), help="Enable local LLM filtering")
     parser.add_argument("--max-tasks", type=int, default=_env_int("MAX_TASKS"), help="Process only the first N tasks")
+    parser.add_argument("--concurrency", type=int, default=_env_int("CONCURRENCY", 4), help="How many URLs to scrape at the same time")
+    parser.add_argument("--cache-dir", default=os.getenv("CACHE_DIR", "scrape_cache"), help="Directory for the scrape result cache")
+    parser.add_argument("--cache-ttl", type=int, default=_env_int("CACHE_TTL", 24 * 3600), help="Cache entry lifetime in seconds (0 disables expiry)")
+    parser.add_argument("--force-rescrape", type=_str_to_bool, default=_env_bool("FORCE_RESCRAPE", False), help="Ignore cached results and scrape every URL again")
     parser.add_argument("--preview", dest="preview_mode", type=_str_to_bool, default=_env_bool("PREVIEW_MODE", False), help="If true, only write the markdown preview")
     parser.add_argument("--preview-output", default=os.getenv("PREVIEW_OUTPUT", "task_preview.md"), help="Path for preview markdown")
     parser.add_argument("--pyautogui-screenshot", dest="use_pyautogui", type=_str_to_bool, default=_env_bool("USE_PYAUTOGUI_SCREENSHOT", False), help="Use PyAutoGUI for full-window screenshots (requires GUI)")
@@ -71,9 +80,13 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--extension-path", default=os.getenv("EXTENSION_PATH"), help="Path to unpacked Chromium extension")
     parser.add_argument("--extension-flag", dest="extension_flags", action="append", default=_env_list("EXTENSION_FLAGS"), help="Extra Chromium flags; can be passed multiple times")
     parser.add_argument("--headless", type=_str_to_bool, default=_env_bool("HEADLESS", True), help="Run browser headless (ignored if PyAutoGUI is enabled)")
+    parser.add_argument("--block-resources", type=_str_to_bool, default=_env_bool("BLOCK_RESOURCES", True), help="Abort media/font/tracker requests to speed up page loads")
     parser.add_argument("--llm-base-url", default=os.getenv("LLM_BASE_URL"), help="Base URL for local LLM endpoint (e.g., http://localhost:11434/v1)")
     parser.add_argument("--llm-api-key", default=os.getenv("LLM_API_KEY"), help="API key for the LLM endpoint (optional for local)")
     parser.add_argument("--llm-timeout", type=float, default=float(os.getenv("LLM_TIMEOUT", "20")), help="LLM request timeout in seconds")
+    parser.add_argument("--llm-max-retries", type=int, default=_env_int("LLM_MAX_RETRIES", 2), help="How many times to retry a failed LLM request")
+    parser.add_argument("--llm-max-output-tokens", type=int, default=_env_int("LLM_MAX_OUTPUT_TOKENS", 800), help="Cap on tokens the LLM may generate per request")
+    parser.add_argument("--llm-batch-size", type=int, default=_env_int("LLM_BATCH_SIZE", 8), help="How many articles to pack into one LLM filter request")
 
     args = parser.parse_args()
 
@@ -96,40 +109,30 @@ def parse_args() -> argparse.Namespace:
         logger.warning("PyAutoGUI requires a visible browser; forcing headless=False.")
         args.headless = False
 
+    if args.llm_timeout <= 0:
+        logger.error(f"--llm-timeout must be positive, got {args.llm_timeout}")
+        sys.exit(1)
+
+    if args.llm_max_retries is None or args.llm_max_retries < 0:
+        logger.warning(f"Invalid llm_max_retries {args.llm_max_retries!r}; falling back to 0.")
+        args.llm_max_retries = 0
+
+    if args.concurrency is None or args.concurrency < 1:
+        logger.warning(f"Invalid concurrency {args.concurrency!r}; falling back to 1.")
+        args.concurrency = 1
+
+    if args.use_pyautogui and args.concurrency > 1:
+        # PyAutoGUI grabs the whole screen after activating a window, so
+        # parallel pages would screenshot whichever one is focused.
+        logger.warning("PyAutoGUI capture needs exclusive screen focus; forcing concurrency=1.")
+        args.concurrency = 1
+
     if args.use_local_llm and not args.llm_base_url:
         args.llm_base_url = "http://localhost:11434/v1"
         logger.info(f"use_local_llm enabled but no LLM base URL provided; defaulting to {args.llm_base_url}")
 
     return args
 
-def write_task_preview(tasks, destination: str):
-    """
-    Saves a lightweight Markdown preview summarizing each parsed task so
-    you can review the list before scraping.
-    """
-    if not tasks:
-        return
-
-    lines = ["# Task Preview", ""]
-    for index, task in enumerate(tasks, start=1):
-        title = task.get("title", "Untitled")
-        source = task.get("source", "Unknown Source")
-        date = task.get("date", "Unknown Date")
-        url = task.get("url", "No URL")
-        snippet = task.get("original_snippet", "").strip()
-
-        lines.extend([
-            f"## {index}. {title}",
-            f"- **Date:** {date}",
-            f"- **Source:** {source}",
-        ])
-        if snippet:
-            lines.append(f"- **Snippet:** {snippet}")
-        lines.append(f"- **URL:** {url}")
-        lines.append("")
-
-    Path(destination).write_text("\n".join(lines), encoding="utf-8")
-
 async def main():
     args = parse_args()
     logger.info("🚀 Starting News Monitoring Task...")
@@ -156,33 +159,108 @@ async def main():
         logger.info(f"🧾 Task preview saved to {args.preview_output}. Skipping scraping.")
         sys.exit(0)
 
-    # 2. Scrape Data (Screenshots + Text)
-    processed_tasks = []
-    async with WebScraper(
-        headless=args.headless,
-        use_llm=args.use_local_llm,
-        capture_with_pyautogui=args.use_pyautogui,
-        interact_with_telegram=args.interact_with_telegram,
-        user_data_dir=args.user_data_dir,
-        extension_path=args.extension_path,
-        extension_launch_flags=args.extension_flags,
-        mask_automation=True,
-        llm_base_url=args.llm_base_url,
-        llm_api_key=args.llm_api_key,
-        llm_timeout=args.llm_timeout,
-    ) as scraper:
-        # Process sequentially to avoid rate limiting or memory explosion, 
-        # but scraping can be parallelized in chunks if needed.
+    # 2+3. Scrape and write as a pipeline: finished results are queued for
+    # the report writer while later URLs are still scraping, so DOCX
+    # assembly overlaps with browser I/O instead of running after it.
+    cache = ScrapeCache(Path(args.cache_dir), ttl=args.cache_ttl)
+    writer = ReportGenerator(args.output_file)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, args.concurrency * 2))
+    total = len(tasks)
+
+    async def writer_worker():
+        # Entries must land in input order; buffer out-of-order arrivals.
+        pending = {}
+        next_index = 0
+        consumed = 0
+        try:
+            while next_index < total:
+                index, result = await queue.get()
+                consumed += 1
+                pending[index] = result
+                while next_index in pending:
+                    # add_entry does CPU-bound image embedding; run it on a
+                    # worker thread so the loop keeps driving Playwright I/O.
+                    await asyncio.to_thread(writer.add_entry, pending.pop(next_index))
+                    next_index += 1
+        except asyncio.CancelledError:
+            raise
+        except BaseException:
+            # Keep draining the bounded queue so producers blocked on
+            # queue.put can finish; the failure surfaces when main awaits
+            # this task.
+            while consumed < total:
+                await queue.get()
+                consumed += 1
+            raise
+
+    writer_task = asyncio.create_task(writer_worker())
+
+    try:
+        # Serve repeat URLs from the disk cache so re-runs only pay for the
+        # missing entries; --force-rescrape bypasses the lookup.
+        to_scrape = []
         for i, task in enumerate(tasks):
-            logger.info(f"[{i+1}/{len(tasks)}] Processing {task['source']}...")
-            result = await scraper.process_url(task)
-            processed_tasks.append(result)
+            cached = None if args.force_rescrape else cache.get(task["url"])
+            if cached is not None:
+                logger.info(f"[{i+1}/{total}] Cache hit for {task['source']}; skipping scrape.")
+                await queue.put((i, {**task, **cached}))
+            else:
+                to_scrape.append((i, task))
+
+        if to_scrape:
+            async with WebScraper(
+                headless=args.headless,
+                use_llm=args.use_local_llm,
+                capture_with_pyautogui=args.use_pyautogui,
+                interact_with_telegram=args.interact_with_telegram,
+                user_data_dir=args.user_data_dir,
+                extension_path=args.extension_path,
+                extension_launch_flags=args.extension_flags,
+                mask_automation=True,
+                llm_base_url=args.llm_base_url,
+                llm_api_key=args.llm_api_key,
+                llm_timeout=args.llm_timeout,
+                llm_max_retries=args.llm_max_retries,
+                llm_max_output_tokens=args.llm_max_output_tokens,
+                block_resources=args.block_resources,
+            ) as scraper:
+                # Scraping is I/O-bound, so dispatch URLs concurrently but
+                # cap the number in flight to avoid rate limiting or memory
+                # explosion.
+                semaphore = asyncio.Semaphore(args.concurrency)
+                # LLM runs filter in batches after all scrapes, so results
+                # can only stream to the writer as they finish without it.
+                stream_to_writer = not args.use_local_llm
+
+                async def run_task(index: int, task):
+                    async with semaphore:
+                        logger.info(f"[{index+1}/{total}] Processing {task['source']}...")
+                        result = await scraper.process_url(task)
+                    if stream_to_writer:
+                        cache.put(result["url"], result)
+                        await queue.put((index, result))
+                    return index, result
+
+                scraped = await asyncio.gather(*(run_task(i, t) for i, t in to_scrape))
+
+                if args.use_local_llm:
+                    logger.info("🧠 Filtering extracted blocks with the LLM...")
+                    await scraper.filter_entries_with_llm(
+                        [result for _, result in scraped], batch_size=args.llm_batch_size
+                    )
+                    for index, result in scraped:
+                        cache.put(result["url"], result)
+                        await queue.put((index, result))
+        else:
+            logger.info("All tasks served from cache; skipping browser startup.")
+
+        await writer_task
+    except BaseException:
+        writer_task.cancel()
+        raise
+    finally:
+        cache.close()
 
-    # 3. Generate Report
-    writer = ReportGenerator(args.output_file)
-    for task in processed_tasks:
-        writer.add_entry(task)
-    
     writer.save()
     logger.info("✨ Task Complete!")
 
@@ -0,0 +1,95 @@
+import json
+import logging
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.urls import canonicalize
+
+logger = logging.getLogger(__name__)
+
+# Scrape-produced keys worth persisting; input metadata (source/date/snippet)
+# always comes fresh from the DOCX, so it is never cached.
+_RESULT_KEYS = ("status", "full_text", "text_blocks", "screenshot_path", "telegram_screenshot_path")
+
+
+class ScrapeCache:
+    """
+    Disk-backed cache of scrape results keyed by normalized URL.
+
+    Successful entries are stored as JSON blobs in a small sqlite database so
+    re-runs (common while iterating on the input DOCX) skip browser navigation
+    and LLM calls for URLs that were already processed within the TTL.
+    Screenshots are copied next to the database because `temp_screenshots` is
+    wiped on every scraper startup.
+    """
+
+    def __init__(self, path: Path, ttl: int = 24 * 3600):
+        self.dir = Path(path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._conn = sqlite3.connect(self.dir / "cache.sqlite3")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (url TEXT PRIMARY KEY, blob TEXT NOT NULL, timestamp REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Returns the cached scrape fields for `url`, or None on miss/expiry.
+        """
+        key = canonicalize(url)
+        row = self._conn.execute("SELECT blob, timestamp FROM results WHERE url = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        blob, timestamp = row
+        if self.ttl and (time.time() - timestamp) > self.ttl:
+            logger.debug(f"Cache entry expired for {url}")
+            return None
+        try:
+            return json.loads(blob)
+        except json.JSONDecodeError as exc:
+            logger.warning(f"Corrupt cache entry for {url}: {exc}")
+            return None
+
+    def put(self, url: str, entry: Dict):
+        """
+        Stores the scrape-produced fields of a successful entry.
+        """
+        if entry.get("status") != "success":
+            return
+        result = {key: entry[key] for key in _RESULT_KEYS if key in entry}
+        for key in ("screenshot_path", "telegram_screenshot_path"):
+            stored = self._store_screenshot(result.get(key))
+            if stored:
+                result[key] = stored
+            else:
+                result.pop(key, None)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (url, blob, timestamp) VALUES (?, ?, ?)",
+            (canonicalize(url), json.dumps(result, ensure_ascii=False, default=str), time.time()),
+        )
+        self._conn.commit()
+
+    def _store_screenshot(self, path) -> Optional[str]:
+        """
+        Copies a screenshot into the cache dir so it survives temp cleanup.
+        """
+        if not path:
+            return None
+        source = Path(path)
+        if not source.is_file():
+            return None
+        target = self.dir / source.name
+        try:
+            if source.resolve() != target.resolve():
+                shutil.copyfile(source, target)
+        except OSError as exc:
+            logger.warning(f"Could not copy screenshot {source} into cache: {exc}")
+            return None
+        return str(target)
+
+    def close(self):
+        self._conn.close()
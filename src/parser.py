@@ -1,15 +1,45 @@
-import docx
 import re
 import logging
-from typing import List, Dict
+import zipfile
+from typing import Dict, Iterator, List
 
 from docx.oxml.ns import qn
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+# qn() does a prefix lookup + string format per call; resolve the Clark
+# names we need exactly once at import.
+_QN_P = qn('w:p')
+_QN_T = qn('w:t')
+_QN_BR = qn('w:br')
+_QN_RID = qn('r:id')
+
+# Internal page-break sentinel yielded by _iter_lines; identity-checkable so
+# consumers never confuse it with document text.
+_PAGE_BREAK = object()
+
+_NSMAP = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+
+# One compiled XPath returns every node _iter_lines cares about, in document
+# order, with the page-break filter applied at C level.
+_PARA_NODES_XPATH = etree.XPath(
+    ".//w:t | .//w:br[@w:type='page'] | .//w:hyperlink",
+    namespaces=_NSMAP,
+)
+
 class TaskParser:
     PAGE_BREAK_MARKER = "#new page#"
 
+    # Compiled once at class creation; the character class already excludes
+    # closing quotes/brackets so noisy DOCX lines don't bleed into the URL.
+    _URL_RE = re.compile(r'https?://[^\s<>"\'«»“”)\]]+')
+    # Strips punctuation that legitimately ends a sentence around a URL.
+    _TRAIL_RE = re.compile(r'[.,;:!?)\]\'"»]+$')
+
     def __init__(self, filepath: str):
         self.filepath = filepath
 
@@ -20,42 +50,31 @@ class TaskParser:
         assume the preceding lines belong to this entry (Source, Date, Title).
         """
         logger.info(f"Parsing input file: {self.filepath}")
-        doc = docx.Document(self.filepath)
         tasks = []
-        
+
         # Buffer to hold lines since the last found URL
         buffer = []
-        
-        # Regex to identify URLs
-        url_pattern = re.compile(r'https?://[^\s]+')
 
-        for text in self._iter_lines(doc):
-            if not text:
+        for text in self._iter_lines():
+            if text is _PAGE_BREAK:
+                buffer = []
                 continue
 
-            if text == self.PAGE_BREAK_MARKER:
-                buffer = []
+            if not text:
                 continue
 
             # Check if this line contains a URL
-            url_match = url_pattern.search(text)
-            
+            url_match = self._URL_RE.search(text)
+
             if url_match:
-                url = url_match.group(0)
                 # Clean URL: remove trailing punctuation that might have been captured
-                url = url.rstrip('.,;:)("\'')
+                url = self._TRAIL_RE.sub('', url_match.group(0))
                 
-                source = "Unknown Source"
-                date = "Unknown Date"
-                snippet_lines = [line for line in buffer if line != self.PAGE_BREAK_MARKER]
-
-                if snippet_lines:
-                    source = snippet_lines[0]
-                if len(snippet_lines) >= 2:
-                    date = snippet_lines[1]
-                body_lines = snippet_lines[2:]
-                snippet = "\n".join(body_lines) if body_lines else ""
-                buffer_snippet = snippet
+                # Page-break sentinels never reach `buffer` (their branch
+                # continues before the append), so it is already clean.
+                source = buffer[0] if buffer else "Unknown Source"
+                date = buffer[1] if len(buffer) >= 2 else "Unknown Date"
+                snippet = "\n".join(buffer[2:])
 
                 logger.debug(f"Found task: {source} - {url}")
 
@@ -64,8 +83,8 @@ class TaskParser:
                     "date": date,
                     "title": None,
                     "url": url,
-                    "snippet": buffer_snippet,
-                    "original_snippet": buffer_snippet
+                    "snippet": snippet,
+                    "original_snippet": snippet
                 })
                 
                 # Clear buffer for the next entry
@@ -76,14 +95,23 @@ class TaskParser:
         logger.info(f"✅ Parsed {len(tasks)} tasks from {self.filepath}")
         return tasks
 
-    def _iter_lines(self, document: docx.document.Document):
+    def _iter_lines(self) -> Iterator:
         """
-        Iterate paragraphs while honoring inline page breaks so we can split long runs.
+        Stream paragraph text from the DOCX, yielding the _PAGE_BREAK
+        sentinel wherever an inline page break occurs.
+
+        Instead of materializing the whole document through python-docx, we
+        open `word/document.xml` straight from the zip and run it through
+        `lxml.etree.iterparse`, clearing each paragraph once consumed so peak
+        memory stays at roughly one paragraph. Hyperlink targets are resolved
+        via the relationships part and injected into the paragraph text so
+        URL-only hyperlinks (invisible to `paragraph.runs`) are still found.
         """
-        qn_t = qn('w:t')
-        qn_br = qn('w:br')
-        qn_type = qn('w:type')
-
+        hyperlink_targets = self._load_hyperlink_rels()
+        # Documents often repeat the same hyperlink target (footers, repeated
+        # mentions); inject each target only once so it doesn't spawn
+        # spurious duplicate tasks.
+        seen_targets = set()
         parts: List[str] = []
 
         def flush_parts():
@@ -91,19 +119,44 @@ class TaskParser:
             parts.clear()
             return text
 
-        for paragraph in document.paragraphs:
-            for run in paragraph.runs:
-                for child in run._element:
-                    if child.tag == qn_t:
-                        parts.append(child.text or "")
-                    elif child.tag == qn_br and child.get(qn_type) == "page":
+        with zipfile.ZipFile(self.filepath) as archive, archive.open('word/document.xml') as stream:
+            for _, paragraph in etree.iterparse(stream, events=('end',), tag=_QN_P):
+                for node in _PARA_NODES_XPATH(paragraph):
+                    if node.tag == _QN_T:
+                        parts.append(node.text or "")
+                    elif node.tag == _QN_BR:
                         text = flush_parts()
                         if text:
                             yield text
-                        yield self.PAGE_BREAK_MARKER
-            text = flush_parts()
-            if text:
-                yield text
+                        yield _PAGE_BREAK
+                    else:
+                        target = hyperlink_targets.get(node.get(_QN_RID))
+                        if target and target not in seen_targets:
+                            seen_targets.add(target)
+                            parts.append(f" {target} ")
+                text = flush_parts()
+                if text:
+                    yield text
+                # Release the consumed subtree so memory doesn't grow with
+                # document size.
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del paragraph.getparent()[0]
+
+    def _load_hyperlink_rels(self) -> Dict[str, str]:
+        """
+        Loads the relationship id -> target map once per document.
+        """
+        try:
+            with zipfile.ZipFile(self.filepath) as archive, archive.open('word/_rels/document.xml.rels') as stream:
+                tree = etree.parse(stream)
+        except KeyError:
+            return {}
+        return {
+            rel.get('Id'): rel.get('Target')
+            for rel in tree.getroot()
+            if rel.get('Id') and rel.get('Target')
+        }
 
 if __name__ == "__main__":
     # Test run
@@ -0,0 +1,28 @@
+from pathlib import Path
+from typing import Dict, List
+
+
+def _render_task(index: int, task: Dict) -> str:
+    snippet = task.get("original_snippet", "").strip()
+    snippet_line = f"- **Snippet:** {snippet}\n" if snippet else ""
+    return (
+        f"## {index}. {task.get('title') or 'Untitled'}\n"
+        f"- **Date:** {task.get('date', 'Unknown Date')}\n"
+        f"- **Source:** {task.get('source', 'Unknown Source')}\n"
+        f"{snippet_line}"
+        f"- **URL:** {task.get('url', 'No URL')}\n"
+    )
+
+
+def write_task_preview(tasks: List[Dict], destination: str):
+    """
+    Saves a lightweight Markdown preview summarizing each parsed task so
+    you can review the list before scraping.
+    """
+    if not tasks:
+        return
+
+    Path(destination).write_text(
+        "# Task Preview\n\n" + "\n".join(_render_task(i, t) for i, t in enumerate(tasks, start=1)),
+        encoding="utf-8",
+    )
@@ -1,10 +1,12 @@
 import asyncio
+import functools
 import hashlib
 import json
 import os
 import logging
 import re
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
@@ -12,8 +14,290 @@ from playwright.async_api import async_playwright, Page
 from bs4 import BeautifulSoup
 from openai import AsyncOpenAI
 
+from src.urls import canonicalize
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Imported up front so the first screenshot doesn't pay the Pillow import
+    # cost inside the scrape critical path.
+    from PIL import Image, ImageDraw
+except ImportError:
+    Image = ImageDraw = None
+
 logger = logging.getLogger(__name__)
 
+
+def _json_loads(text: str):
+    """
+    orjson-backed parse for LLM responses, falling back to stdlib json.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _json_dumps(value) -> str:
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, ensure_ascii=False)
+
+# Scrape-produced keys shared between duplicate entries for the same URL.
+_SHARED_RESULT_KEYS = ("status", "full_text", "text_blocks", "raw_blocks", "screenshot_path", "telegram_screenshot_path")
+
+# Resource types that never contribute to the screenshot or extracted text.
+# Images and stylesheets stay enabled because every run captures a viewport
+# screenshot for the report.
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+
+@functools.lru_cache(maxsize=4096)
+def _slugify_url(url: str) -> str:
+    """
+    Filesystem-safe slug for a URL; memoized since the same URL is slugged
+    for every screenshot variant and duplicate entry.
+    """
+    parsed = urlparse(url)
+    parts = [parsed.netloc or "", parsed.path or ""]
+    raw = "_".join(p.strip("/") for p in parts if p).strip("_")
+    raw = _SLUG_RE.sub("-", raw).strip("-") or "page"
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return f"{raw[:80]}-{digest}"
+
+
+# Bound on remembered LLM filter results (see WebScraper._llm_cache).
+_LLM_CACHE_MAX = 256
+
+# One Playwright driver (a Node subprocess, ~1 s cold start) shared by every
+# WebScraper in the process, reference-counted so it stops only when the last
+# scraper closes. Use WebScraper as an async context manager so the count
+# drops deterministically.
+_shared_playwright = None
+_shared_playwright_refs = 0
+_shared_playwright_lock = asyncio.Lock()
+
+
+async def _acquire_shared_playwright():
+    global _shared_playwright, _shared_playwright_refs
+    async with _shared_playwright_lock:
+        if _shared_playwright is None:
+            _shared_playwright = await async_playwright().start()
+        _shared_playwright_refs += 1
+        return _shared_playwright
+
+
+async def _release_shared_playwright():
+    global _shared_playwright, _shared_playwright_refs
+    async with _shared_playwright_lock:
+        if _shared_playwright_refs == 0:
+            return
+        _shared_playwright_refs -= 1
+        if _shared_playwright_refs == 0 and _shared_playwright is not None:
+            await _shared_playwright.stop()
+            _shared_playwright = None
+
+_BLOCKED_RESOURCE_TYPES = frozenset({"media", "font", "websocket"})
+_TRACKER_DOMAINS_RE = re.compile(
+    r"doubleclick\.net|googletagmanager\.com|google-analytics\.com|googlesyndication\.com"
+    r"|facebook\.net|hotjar\.com|segment\.com|mc\.yandex\.ru|an\.yandex\.ru|criteo\.com|scorecardresearch\.com",
+    re.IGNORECASE,
+)
+
+# In-page helpers, registered once per context via add_init_script so V8
+# parses/compiles them a single time per page load. Each page.evaluate call
+# then ships a tiny `window.__scraper.<fn>()` dispatcher instead of multi-kB
+# source.
+_SCRAPER_HELPERS_JS = """
+window.__scraper = {
+    collectBlocks() {
+        const MIN_LENGTH = 70;
+        const MAX_LENGTH = 2500;
+        // Set lookup is O(1) per node versus the old array includes() scan.
+        const BLACKLIST = new Set(['script', 'style', 'nav', 'footer', 'header', 'form', 'noscript']);
+        const describe = (node) => {
+            const parts = [];
+            let current = node;
+            while (current && current.nodeType === 1) {
+                let part = current.tagName.toLowerCase();
+                if (current.id) {
+                    part += `#${current.id}`;
+                    parts.unshift(part);
+                    break;
+                }
+                const parent = current.parentElement;
+                if (!parent) {
+                    parts.unshift(part);
+                    break;
+                }
+                const siblings = Array.from(parent.children).filter(child => child.tagName === current.tagName);
+                if (siblings.length > 1) {
+                    const index = siblings.indexOf(current);
+                    part += `:nth-of-type(${index + 1})`;
+                }
+                parts.unshift(part);
+                current = parent;
+            }
+            return parts.join(' > ');
+        };
+
+        // innerText forces layout; read it at most once per element.
+        const textCache = new Map();
+        const textOf = (element) => {
+            let text = textCache.get(element);
+            if (text === undefined) {
+                text = element.innerText || "";
+                textCache.set(element, text);
+            }
+            return text;
+        };
+
+        const accepted = new WeakSet();
+        const candidates = [];
+        const addCandidate = (element) => {
+            if (!element || !element.isConnected) return;
+            if (BLACKLIST.has(element.tagName.toLowerCase())) return;
+            const text = textOf(element);
+            const trimmed = text.trim();
+            if (trimmed.length < MIN_LENGTH || trimmed.length > MAX_LENGTH) return;
+            // Walk up to skip descendants of accepted blocks instead of
+            // scanning every candidate with contains().
+            for (let ancestor = element.parentElement; ancestor; ancestor = ancestor.parentElement) {
+                if (accepted.has(ancestor)) return;
+            }
+            const trimmedLength = trimmed.length;
+            const hasHeavyChild = Array.from(element.children).some(child => {
+                if (!child || !child.isConnected) return false;
+                return textOf(child).trim().length >= trimmedLength * 0.6;
+            });
+            if (hasHeavyChild) return;
+            accepted.add(element);
+            candidates.push({ element, text });
+        };
+
+        // One batched query in document order replaces the TreeWalker that
+        // re-read innerText inside its filter on every visited node.
+        const elements = document.querySelectorAll('article, main, section, div, p, li');
+        for (const element of elements) {
+            addCandidate(element);
+            if (candidates.length >= 50) break;
+        }
+
+        if (!candidates.length) {
+            document.querySelectorAll('p').forEach(addCandidate);
+        }
+
+        const blocks = [];
+        for (let i = 0; i < candidates.length && blocks.length < 30; i++) {
+            const entry = candidates[i];
+            blocks.push({
+                id: `block-${i + 1}`,
+                selector: describe(entry.element),
+                text: entry.text
+            });
+        }
+
+        return blocks;
+    },
+
+    collectBlocksForLlm() {
+        // The LLM filter only ever sees (and can only select) the ten
+        // longest blocks, so rank and cut inside the page instead of
+        // shipping up to 30 full texts over the CDP channel.
+        const blocks = this.collectBlocks();
+        blocks.sort((a, b) => b.text.length - a.text.length);
+        return blocks.slice(0, 10);
+    },
+
+    collectJoinedText() {
+        // Non-LLM path: the caller concatenates every block anyway, so join
+        // in-page and ship one compact string instead of per-block objects.
+        return this.collectBlocks().map(block => block.text).filter(Boolean).join('\\n\\n');
+    },
+
+    fallbackText() {
+        // Cheap last-resort extraction kept inside the page so the caller
+        // doesn't have to serialize the whole DOM over CDP.
+        return Array.from(document.body.querySelectorAll('p, li, h1, h2, h3'))
+            .map(el => (el.innerText || '').trim())
+            .filter(text => text.length > 30)
+            .join('\\n\\n');
+    },
+
+    acceptCookies() {
+        const buttons = Array.from(document.querySelectorAll('button, a'));
+        const acceptBtn = buttons.find(b => b.innerText.toLowerCase().includes('accept') || b.innerText.toLowerCase().includes('принять'));
+        if (acceptBtn) { acceptBtn.click(); return true; }
+        return false;
+    },
+
+    dismissTelegram() {
+        // One compiled regex instead of keywords.some(includes) per node,
+        // and only dialog/modal/popup-ish containers are scanned rather
+        // than every button/div/span on the page.
+        const RE = /open telegram|open in app|telegram app|download telegram|launch telegram|view in channel/i;
+        const containers = document.querySelectorAll('div[role="dialog"], div[class*="modal"], div[class*="popup"], section, article');
+        containers.forEach(el => {
+            const text = el.innerText || '';
+            if (text && RE.test(text)) {
+                el.style.display = 'none';
+            }
+        });
+    },
+
+    clickTelegram() {
+        const RE = /open in telegram|open telegram|launch telegram|use telegram app|view in channel/i;
+        for (const el of document.querySelectorAll('button, a')) {
+            const text = el.innerText || '';
+            const href = (el.getAttribute('href') || '').toLowerCase();
+            if (RE.test(text) || href.startsWith('tg:') || href.includes('t.me')) {
+                el.click();
+                return true;
+            }
+        }
+        return false;
+    },
+
+    preparePage(opts) {
+        // One round-trip for all page-prep routines; each used to be its
+        // own evaluate and therefore its own CDP ping.
+        const result = { cookiesClicked: this.acceptCookies(), telegramOpened: false };
+        if (opts.dismissTelegram) this.dismissTelegram();
+        if (opts.clickTelegram) result.telegramOpened = this.clickTelegram();
+        this.hideAutomationBanner();
+        return result;
+    },
+
+    hideAutomationBanner() {
+        const styles = [
+            'body::before',
+            '#automationBanner',
+        ];
+        styles.forEach(sel => {
+            const element = document.querySelector(sel);
+            if (element) {
+                element.style.display = 'none';
+            }
+        });
+        const BANNER_RE = /automated test software|контролируется программным обеспечением/i;
+        const hideBanner = () => {
+            document.querySelectorAll('div, span, p').forEach(el => {
+                const text = el.innerText || '';
+                if (text && BANNER_RE.test(text)) {
+                    el.style.display = 'none';
+                    if (el.parentElement) el.parentElement.style.display = 'none';
+                }
+            });
+        };
+        hideBanner();
+        new MutationObserver(hideBanner).observe(document.body, { childList: true, subtree: true });
+    }
+};
+"""
+
+
 class WebScraper:
     def __init__(
         self,
@@ -28,6 +312,9 @@ class WebScraper:
         llm_base_url: Optional[str] = None,
         llm_api_key: Optional[str] = None,
         llm_timeout: float = 20.0,
+        llm_max_retries: int = 2,
+        llm_max_output_tokens: int = 800,
+        block_resources: bool = True,
     ):
         if capture_with_pyautogui and headless:
             logger.warning("PyAutoGUI screenshots require a visible browser; switching headless to False.")
@@ -43,20 +330,37 @@ class WebScraper:
         self.user_data_dir = user_data_dir
         self.extension_path = extension_path
         self.extension_launch_flags = extension_launch_flags or []
-        self.temp_dir = Path("temp_screenshots")
+        self.block_resources = block_resources
+        # Resolved once so every per-URL screenshot path is pure PurePath
+        # arithmetic with no cwd lookups or str/Path conversions downstream.
+        self.temp_dir = Path("temp_screenshots").resolve()
         self.temp_dir.mkdir(exist_ok=True)
         self._clean_temp_dir()
         self._playwright = None
         self._browser = None
         self._context = None
+        # Concurrent process_url calls may race on lazy startup; the lock
+        # guarantees exactly one browser/context is ever launched.
+        self._context_lock = asyncio.Lock()
+        # In-run dedup: results per normalized URL, plus per-URL locks so
+        # concurrent duplicates coalesce onto one scrape instead of racing.
+        self._url_results: Dict[str, Dict] = {}
+        self._url_locks: Dict[str, asyncio.Lock] = {}
+        # Memoized LLM filter results keyed on a hash of the block payload,
+        # so retries and identical articles skip the model round-trip.
+        self._llm_cache: "OrderedDict[str, List[str]]" = OrderedDict()
         
-        # Setup Local LLM client (compatible with Ollama/LM Studio)
+        # Setup Local LLM client (compatible with Ollama/LM Studio).
+        # Timeout, retries, and output tokens are all bounded so a stalled
+        # endpoint can't hang the scraping loop indefinitely.
         self.llm_client = None
+        self.llm_max_output_tokens = llm_max_output_tokens
         if self.use_llm and llm_base_url:
             self.llm_client = AsyncOpenAI(
                 base_url=llm_base_url,
                 api_key=llm_api_key or "sk-local-key",
                 timeout=llm_timeout,
+                max_retries=llm_max_retries,
             )
         elif self.use_llm and not llm_base_url:
             logger.warning("use_llm is enabled but no LLM base URL provided; falling back to non-LLM extraction.")
@@ -71,11 +375,18 @@ class WebScraper:
     async def _ensure_context(self):
         """
         Lazily start Playwright and a browser context for reuse across URLs.
+        Safe to call from concurrent tasks; only the first caller launches.
         """
         if self._context:
             return
 
-        self._playwright = await async_playwright().start()
+        async with self._context_lock:
+            if self._context:
+                return
+            await self._start_context()
+
+    async def _start_context(self):
+        self._playwright = await _acquire_shared_playwright()
         p = self._playwright
         use_persistent = bool(self.user_data_dir)
 
@@ -108,6 +419,21 @@ class WebScraper:
             )
 
         await self._apply_automation_mask(self._context)
+        await self._context.add_init_script(_SCRAPER_HELPERS_JS)
+
+        if self.block_resources:
+            await self._context.route("**/*", self._route_filter)
+
+    async def _route_filter(self, route):
+        """
+        Aborts media/font/websocket requests and known tracker domains; they
+        only slow navigation down and never show up in the report.
+        """
+        request = route.request
+        if request.resource_type in _BLOCKED_RESOURCE_TYPES or _TRACKER_DOMAINS_RE.search(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
 
     async def close(self):
         """
@@ -124,7 +450,7 @@ class WebScraper:
         finally:
             self._browser = None
         if self._playwright:
-            await self._playwright.stop()
+            await _release_shared_playwright()
             self._playwright = None
 
     def _clean_temp_dir(self):
@@ -138,177 +464,218 @@ class WebScraper:
         except Exception as exc:
             logger.warning(f"Could not clean temp dir {self.temp_dir}: {exc}")
 
-    def _slugify_url(self, url: str) -> str:
-        parsed = urlparse(url)
-        parts = [parsed.netloc or "", parsed.path or ""]
-        raw = "_".join(p.strip("/") for p in parts if p).strip("_")
-        raw = re.sub(r"[^a-zA-Z0-9]+", "-", raw).strip("-") or "page"
-        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
-        return f"{raw[:80]}-{digest}"
-
     def _screenshot_path(self, url: str, prefix: str) -> Path:
-        return self.temp_dir / f"{prefix}_{self._slugify_url(url)}.png"
+        return self.temp_dir / f"{prefix}_{_slugify_url(url)}.png"
 
-    async def _collect_text_blocks(self, page: Page) -> List[Dict[str, str]]:
+    async def _collect_text_blocks(self, page: Page, top_for_llm: bool = False) -> List[Dict[str, str]]:
         """
-        Collects DOM blocks that resemble article sections and tags them with selectors.
-        """
-        script = """
-        () => {
-            const MIN_LENGTH = 70;
-            const MAX_LENGTH = 2500;
-            const blacklist = ['script', 'style', 'nav', 'footer', 'header', 'form', 'noscript'];
-            const describe = (node) => {
-                const parts = [];
-                let current = node;
-                while (current && current.nodeType === 1) {
-                    let part = current.tagName.toLowerCase();
-                    if (current.id) {
-                        part += `#${current.id}`;
-                        parts.unshift(part);
-                        break;
-                    }
-                    const parent = current.parentElement;
-                    if (!parent) {
-                        parts.unshift(part);
-                        break;
-                    }
-                    const siblings = Array.from(parent.children).filter(child => child.tagName === current.tagName);
-                    if (siblings.length > 1) {
-                        const index = siblings.indexOf(current);
-                        part += `:nth-of-type(${index + 1})`;
-                    }
-                    parts.unshift(part);
-                    current = parent;
-                }
-                return parts.join(' > ');
-            };
-
-            const candidates = [];
-            const addCandidate = (element) => {
-                if (!element || !element.isConnected) return;
-                if (blacklist.includes(element.tagName.toLowerCase())) return;
-                const text = element.innerText || "";
-                const trimmed = text.trim();
-                if (trimmed.length < MIN_LENGTH || trimmed.length > MAX_LENGTH) return;
-                if (candidates.some(entry => entry.element.contains(element))) return;
-                const trimmedLength = trimmed.length;
-                const hasHeavyChild = Array.from(element.children).some(child => {
-                    if (!child || !child.isConnected) return false;
-                    const childText = (child.innerText || "").trim();
-                    return childText.length >= trimmedLength * 0.6;
-                });
-                if (hasHeavyChild) return;
-                candidates.push({ element, text });
-            };
-
-            const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT, {
-                acceptNode(node) {
-                    if (!node || !node.isConnected) return NodeFilter.FILTER_REJECT;
-                    const tag = node.tagName.toLowerCase();
-                    if (blacklist.includes(tag)) return NodeFilter.FILTER_REJECT;
-                    if (!node.innerText || node.innerText.trim().length < MIN_LENGTH) return NodeFilter.FILTER_SKIP;
-                    return NodeFilter.FILTER_ACCEPT;
-                }
-            });
-
-            while (walker.nextNode()) {
-                addCandidate(walker.currentNode);
-                if (candidates.length >= 50) break;
-            }
-
-            if (!candidates.length) {
-                document.querySelectorAll('p').forEach(addCandidate);
-            }
-
-            const blocks = [];
-            for (let i = 0; i < candidates.length && blocks.length < 30; i++) {
-                const entry = candidates[i];
-                blocks.push({
-                    id: `block-${i + 1}`,
-                    selector: describe(entry.element),
-                    text: entry.text
-                });
-            }
-
-            return blocks;
-        }
+        Collects DOM blocks that resemble article sections and tags them with
+        selectors. With `top_for_llm`, the page ranks blocks by length and
+        returns only the ten the filter prompt would use anyway.
         """
+        helper = "collectBlocksForLlm" if top_for_llm else "collectBlocks"
         try:
-            return await page.evaluate(script)
+            return await page.evaluate(f"() => window.__scraper.{helper}()")
         except Exception:
             logger.warning("Unable to collect structured text blocks from the page.")
             return []
 
-    async def _filter_blocks_with_llm(self, blocks: List[Dict[str, str]], entry_title: str | None = None) -> List[str]:
+    async def _collect_joined_text(self, page: Page) -> str:
         """
-        Ask the LLM to select the most relevant blocks without rewriting the text.
+        Block texts joined in-page; one string over CDP instead of up to 30
+        selector-tagged objects. Used when no LLM will pick among blocks.
         """
-        if not blocks:
-            return []
-        if not self.llm_client:
-            logger.debug("LLM client not configured; returning raw blocks.")
-            return [block["text"] for block in sorted(blocks, key=lambda b: len(b.get("text", "")), reverse=True)[:5]]
+        try:
+            return await page.evaluate("() => window.__scraper.collectJoinedText()")
+        except Exception:
+            logger.warning("Unable to collect joined text from the page.")
+            return ""
 
+    @staticmethod
+    def _fallback_blocks(blocks: List[Dict[str, str]]) -> List[str]:
+        """
+        Non-LLM heuristic: keep the five longest blocks.
+        """
+        return [block["text"] for block in sorted(blocks, key=lambda b: len(b.get("text", "")), reverse=True)[:5]]
+
+    @staticmethod
+    def _preview_payload(blocks: List[Dict[str, str]]) -> str:
+        """
+        JSON preview of an article's top blocks for the filter prompt; also
+        the identity used to memoize filter results.
+        """
         sorted_blocks = sorted(blocks, key=lambda block: len(block.get("text", "")), reverse=True)
-        preview_blocks = []
-        for block in sorted_blocks[:10]:
-            snippet = block["text"].replace("\n", " ")
-            preview_blocks.append({
+        preview = [
+            {
                 "id": block["id"],
                 "selector": block["selector"],
-                "snippet": snippet[:500]
-            })
+                "snippet": block["text"].replace("\n", " ")[:500],
+            }
+            for block in sorted_blocks[:10]
+        ]
+        return _json_dumps(preview)
 
-        block_payload = "\n\n".join(
-            f'{block["id"]} | {block["selector"]}\n{block["snippet"]}'
-            for block in preview_blocks
-        )
+    def _remember_llm_result(self, key: str, filtered: List[str]):
+        """
+        LRU-bounded memo of filter selections; only model-confirmed results
+        land here, never fallbacks.
+        """
+        cache = self._llm_cache
+        cache[key] = filtered
+        cache.move_to_end(key)
+        while len(cache) > _LLM_CACHE_MAX:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def _apply_filtered(entry: Dict, filtered: List[str]):
+        entry.pop("raw_blocks", None)
+        entry["text_blocks"] = list(filtered)
+        entry["full_text"] = "\n\n".join(block for block in filtered if block)
+
+    @staticmethod
+    def _selected_ids(value) -> List[str]:
+        """
+        Pulls block ids out of a lenient mix of shapes the model may return.
+        """
+        if isinstance(value, dict):
+            for key in ("selected", "keep", "blocks"):
+                if isinstance(value.get(key), list):
+                    value = value[key]
+                    break
+            else:
+                return []
+        ids = []
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    ids.append(item)
+                elif isinstance(item, dict) and "id" in item:
+                    ids.append(item["id"])
+        return ids
+
+    async def filter_entries_with_llm(self, entries: List[Dict], batch_size: int = 8):
+        """
+        Run the LLM block filter over scraped entries, several articles per
+        request, so a local endpoint can batch them instead of being pinged
+        once per task. Entries keep their raw-block fallback if the model
+        fails or is not configured.
+        """
+        pending = [entry for entry in entries if entry.get("raw_blocks")]
+        if not pending:
+            return
+        if not self.llm_client:
+            logger.debug("LLM client not configured; keeping raw blocks.")
+            for entry in pending:
+                entry["text_blocks"] = self._fallback_blocks(entry.pop("raw_blocks"))
+                entry["full_text"] = "\n\n".join(entry["text_blocks"])
+            return
 
+        # The preview payload fully determines the model's answer, so hash it
+        # and serve repeated articles (retries, syndicated copies) from the
+        # in-memory LRU instead of another round-trip.
+        misses = []
+        for entry in pending:
+            payload = self._preview_payload(entry["raw_blocks"])
+            key = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+            cached = self._llm_cache.get(key)
+            if cached is not None:
+                logger.debug(f"LLM filter cache hit for {entry.get('url')}")
+                self._llm_cache.move_to_end(key)
+                self._apply_filtered(entry, cached)
+            else:
+                misses.append((key, payload, entry))
+
+        batch_size = max(1, batch_size)
+        for start in range(0, len(misses), batch_size):
+            await self._filter_batch(misses[start:start + batch_size])
+
+    async def _collect_llm_output(self, messages: List[Dict]) -> str:
+        """
+        Streams the completion and stops reading once the top-level JSON
+        object closes, so prose a chatty model appends after the answer
+        costs no extra latency. Falls back to a buffered completion if the
+        endpoint rejects streaming.
+        """
+        request = {
+            "model": "llama3",
+            "temperature": 0.2,
+            "max_tokens": self.llm_max_output_tokens,
+            "messages": messages,
+        }
         try:
-            response = await self.llm_client.chat.completions.create(
-                model="llama3",
-                temperature=0.2,
-                max_tokens=800,
-                messages=[
-                    {"role": "system", "content": "You are a fact-aware content editor. Given DOM blocks with selectors and snippets, tell me which ones belong to the main article body and return only JSON. Ignore unrelated nav, captions, and preview cards."},
-                    {"role": "user", "content": (
-                        f"Article title: {entry_title or 'unknown'}\n"
-                        f"Blocks:\n{block_payload}\n\n"
-                        "Respond with JSON in the format {\"selected\": [\"block-1\", ...], \"notes\": {\"block-1\": \"why\"}}. "
-                        "Do not rewrite the snippets; just flag the blocks that belong to this article."
-                    )}
-                ]
-            )
+            stream = await self.llm_client.chat.completions.create(stream=True, **request)
+        except Exception as exc:
+            logger.debug(f"LLM streaming unavailable ({exc}); using a buffered completion.")
+            response = await self.llm_client.chat.completions.create(**request)
+            return response.choices[0].message.content or ""
+
+        parts = []
+        depth = 0
+        opened = False
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                for char in delta:
+                    if char == "{":
+                        depth += 1
+                        opened = True
+                    elif char == "}":
+                        depth -= 1
+                if opened and depth <= 0:
+                    break
+        finally:
+            await stream.close()
+        return "".join(parts)
+
+    async def _filter_batch(self, batch: List[tuple]):
+        """
+        One LLM request selecting the article-body blocks for every entry in
+        the batch; applies the selection (or the length fallback) in place.
+        Each batch item is a (cache_key, payload, entry) triple from
+        filter_entries_with_llm.
+        """
+        labels = {f"a{i + 1}": item for i, item in enumerate(batch)}
+        payload = "\n\n".join(
+            f"### {label} | {entry.get('title') or 'unknown'}\n{block_payload}"
+            for label, (_, block_payload, entry) in labels.items()
+        )
 
-            llm_output = response.choices[0].message.content.strip()
+        messages = [
+            {"role": "system", "content": "You are a fact-aware content editor. Given DOM blocks with selectors and snippets for one or more articles, tell me which blocks belong to each article's main body and return only JSON. Ignore unrelated nav, captions, and preview cards."},
+            {"role": "user", "content": (
+                f"Articles:\n{payload}\n\n"
+                "Respond with JSON in the format {\"articles\": {\"a1\": {\"selected\": [\"block-1\", ...]}, ...}}. "
+                "Do not rewrite the snippets; just flag the blocks that belong to each article."
+            )}
+        ]
+
+        try:
+            llm_output = (await self._collect_llm_output(messages)).strip()
             start = llm_output.find("{")
             end = llm_output.rfind("}")
             if start == -1 or end == -1:
                 raise json.JSONDecodeError("No JSON object found", llm_output, 0)
-            parsed = json.loads(llm_output[start:end + 1])
+            parsed = _json_loads(llm_output[start:end + 1])
         except Exception as exc:
             logger.error(f"⚠️ LLM block filter failed: {exc}. Using raw block candidates.")
-            return [block["text"] for block in sorted_blocks[:5]]
-
-        selected_ids = []
-        for key in ("selected", "keep", "blocks"):
-            value = parsed.get(key)
-            if isinstance(value, list):
-                for item in value:
-                    if isinstance(item, str):
-                        selected_ids.append(item)
-                    elif isinstance(item, dict) and "id" in item:
-                        selected_ids.append(item["id"])
-                if selected_ids:
-                    break
-
-        selected_ids = set(selected_ids)
-        filtered = [block["text"] for block in blocks if block["id"] in selected_ids]
-        if not filtered:
-            filtered = [block["text"] for block in sorted_blocks[:5]]
+            for _, _, entry in batch:
+                entry["text_blocks"] = self._fallback_blocks(entry.pop("raw_blocks"))
+                entry["full_text"] = "\n\n".join(entry["text_blocks"])
+            return
 
-        return filtered
+        articles = parsed.get("articles") if isinstance(parsed.get("articles"), dict) else parsed
+        for label, (key, _, entry) in labels.items():
+            blocks = entry["raw_blocks"]
+            selected = set(self._selected_ids(articles.get(label, [])))
+            filtered = [block["text"] for block in blocks if block["id"] in selected]
+            if filtered:
+                self._remember_llm_result(key, filtered)
+            else:
+                filtered = self._fallback_blocks(blocks)
+            self._apply_filtered(entry, filtered)
 
     def _activate_browser_window(self, pyautogui, title: Optional[str]):
         if not title:
@@ -326,7 +693,7 @@ class WebScraper:
             logger.debug(f"Could not manipulate browser window: {exc}")
             return None
 
-    def _capture_screen_with_pyautogui(self, path: str, page_title: Optional[str]) -> bool:
+    def _capture_screen_with_pyautogui(self, path: Path, page_title: Optional[str]) -> bool:
         try:
             import pyautogui
         except ImportError:
@@ -351,7 +718,7 @@ class WebScraper:
             logger.error(f"PyAutoGUI capture failed: {exc}")
             return self._capture_with_imagegrab(path)
 
-    def _capture_with_imagegrab(self, path: str) -> bool:
+    def _capture_with_imagegrab(self, path: Path) -> bool:
         try:
             from PIL import ImageGrab
         except ImportError:
@@ -366,66 +733,28 @@ class WebScraper:
             logger.error(f"ImageGrab capture failed: {exc}")
             return False
 
-    async def _dismiss_telegram_prompt(self, page: Page):
-        """
-        Hides overlays that try to open Telegram or other external apps.
+    async def _prepare_page(self, page: Page) -> Dict:
         """
-        try:
-            await page.keyboard.press("Escape")
-        except Exception:
-            pass
-
-        script = """
-        () => {
-            const keywords = ['open telegram', 'open in app', 'telegram app', 'download telegram', 'launch telegram', 'view in channel'];
-            const elements = document.querySelectorAll('button, a, div, span');
-            elements.forEach(el => {
-                const text = (el.innerText || '').toLowerCase();
-                if (!text) return;
-                if (keywords.some(keyword => text.includes(keyword))) {
-                    const container = el.closest('div[role="dialog"], div[class*="modal"], div[class*="popup"], section, article') || el;
-                    container.style.display = 'none';
-                }
-            });
-        }
+        Runs cookie cleanup, Telegram prompt handling, and the automation
+        banner hide in a single evaluate — one CDP round-trip instead of one
+        per routine.
         """
-        try:
-            await page.evaluate(script)
-        except Exception as exc:
-            logger.debug(f"Could not dismiss Telegram prompt: {exc}")
-
-    async def _click_open_in_telegram(self, page: Page) -> bool:
-        """
-        Clicks the 'Open in Telegram' prompt if present.
-        """
-        script = """
-        () => {
-            const keywords = ['open in telegram', 'open telegram', 'launch telegram', 'use telegram app', 'view in channel'];
-            const elements = document.querySelectorAll('button, a');
-            const isTelegramHref = (href) => {
-                if (!href) return false;
-                const lower = href.toLowerCase();
-                return lower.startsWith('tg:') || lower.includes('t.me');
-            };
-
-            for (const el of elements) {
-                const text = (el.innerText || '').toLowerCase();
-                const href = el.getAttribute('href') || '';
-                if (keywords.some(keyword => text.includes(keyword)) || isTelegramHref(href)) {
-                    el.click();
-                    return true;
-                }
-            }
-            return false;
+        if self.interact_with_telegram:
+            try:
+                await page.keyboard.press("Escape")
+            except Exception:
+                pass
+        options = {
+            "dismissTelegram": self.interact_with_telegram,
+            "clickTelegram": self.capture_with_pyautogui and self.interact_with_telegram,
         }
-        """
         try:
-            return await page.evaluate(script)
+            return await page.evaluate("(opts) => window.__scraper.preparePage(opts)", options)
         except Exception as exc:
-            logger.debug(f"Could not trigger Telegram link: {exc}")
-            return False
+            logger.debug(f"Page preparation script failed: {exc}")
+            return {"cookiesClicked": False, "telegramOpened": False}
 
-    def _capture_telegram_app_window(self, path: str) -> bool:
+    def _capture_telegram_app_window(self, path: Path) -> bool:
         try:
             import pyautogui
         except ImportError:
@@ -471,56 +800,68 @@ class WebScraper:
         except Exception as exc:
             logger.debug(f"Unable to inject automation mask script: {exc}")
 
-    async def _hide_automation_banner(self, page: Page):
-        script = """
-        () => {
-            const selector = '#automationBanner, .automation-popup, .browser-under-control';
-            const styles = [
-                'body::before',
-                '#automationBanner',
-            ];
-            styles.forEach(sel => {
-                const element = document.querySelector(sel);
-                if (element) {
-                    element.style.display = 'none';
-                }
-            });
-            const hideBanner = () => {
-                document.querySelectorAll('div, span, p').forEach(el => {
-                    const text = (el.innerText || '').toLowerCase();
-                    if (text.includes('automated test software') || text.includes('контролируется программным обеспечением')) {
-                        el.style.display = 'none';
-                        if (el.parentElement) el.parentElement.style.display = 'none';
-                    }
-                });
-            };
-            hideBanner();
-            new MutationObserver(hideBanner).observe(document.body, { childList: true, subtree: true });
-        }
-        """
-        try:
-            await page.evaluate(script)
-        except Exception as exc:
-            logger.debug(f"Unable to hide automation banner: {exc}")
-
-    async def _mask_screenshot_area(self, path: str):
+    async def _mask_screenshot_area(self, path: Path):
+        # PIL decode/draw/encode is synchronous CPU work; run it on a worker
+        # thread so concurrent pages keep scraping while the PNG is rewritten.
         if not self.mask_automation:
             return
+        await asyncio.to_thread(self._mask_screenshot_area_sync, path)
+
+    def _mask_screenshot_area_sync(self, path: Path):
+        if Image is None:
+            logger.warning("Pillow not available for masking screenshot area.")
+            return
         try:
-            from PIL import Image, ImageDraw
             image = Image.open(path)
             draw = ImageDraw.Draw(image)
             height = 85+min(45, image.height)
             draw.rectangle([(6, 85), (image.width-11, height)], fill=(53, 54, 58))
             image.save(path)
-        except ImportError:
-            logger.warning("Pillow not available for masking screenshot area.")
         except Exception as exc:
             logger.debug(f"Failed to mask screenshot area: {exc}")
 
     async def process_url(self, entry: Dict) -> Dict:
         """
         Takes a task entry, visits URL, takes screenshot, extracts text.
+        Duplicate URLs within a run are scraped once; later occurrences get
+        a copy of the first result merged over their own metadata.
+        """
+        key = canonicalize(entry['url'])
+        lock = self._url_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            shared = self._url_results.get(key)
+            if shared is not None:
+                logger.info(f"🔁 Duplicate URL in this run; reusing result for {entry['url']}")
+                return {**entry, **shared}
+            result = await self._scrape_url(entry)
+            if result.get('status') == 'success':
+                self._url_results[key] = {k: result[k] for k in _SHARED_RESULT_KEYS if k in result}
+        return result
+
+    async def process_urls(self, entries: List[Dict], concurrency: Optional[int] = None) -> List[Dict]:
+        """
+        Fans process_url out over many entries inside the one shared
+        browser, capping simultaneous pages with a semaphore. Results come
+        back in input order. When `concurrency` is not given it defaults to
+        the MAX_PARALLEL_PAGES env var (4).
+        """
+        if concurrency is None:
+            try:
+                concurrency = int(os.getenv("MAX_PARALLEL_PAGES", "4"))
+            except ValueError:
+                concurrency = 4
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def process_one(entry: Dict) -> Dict:
+            async with semaphore:
+                return await self.process_url(entry)
+
+        await self._ensure_context()
+        return await asyncio.gather(*(process_one(entry) for entry in entries))
+
+    async def _scrape_url(self, entry: Dict) -> Dict:
+        """
+        Visits the URL, takes the screenshot, and extracts text blocks.
         """
         url = entry['url']
         screenshot_path = self._screenshot_path(url, "screen")
@@ -536,35 +877,45 @@ class WebScraper:
             # Go to page
             logger.debug(f"Navigating to {url}")
             await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            await page.wait_for_timeout(2000) # Slight wait for dynamic content (VK/Dzen)
-
-            # --- Attempt to cleanup cookie banners (Simple heuristic) ---
+            # Dynamic content (VK/Dzen): wait only while the network is
+            # actually busy instead of a blind 2s sleep.
             try:
-                logger.debug("Attempting to close cookie banners...")
-                await page.evaluate("""() => {
-                    const buttons = Array.from(document.querySelectorAll('button, a'));
-                    const acceptBtn = buttons.find(b => b.innerText.toLowerCase().includes('accept') || b.innerText.toLowerCase().includes('принять'));
-                    if (acceptBtn) acceptBtn.click();
-                }""")
-                await page.wait_for_timeout(1000)
+                await page.wait_for_load_state("networkidle", timeout=5000)
             except Exception:
-                pass
-
-            if self.interact_with_telegram:
-                await self._dismiss_telegram_prompt(page)
-            telegram_prompt_opened = False
-            if self.capture_with_pyautogui and self.interact_with_telegram:
-                telegram_prompt_opened = await self._click_open_in_telegram(page)
-                if telegram_prompt_opened:
-                    await page.wait_for_timeout(1500)
+                logger.debug("Network did not go idle in time; continuing with what loaded.")
+
+            # --- Page prep: cookies, Telegram prompts, automation banner ---
+            prepared = await self._prepare_page(page)
+            if prepared.get("cookiesClicked"):
+                try:
+                    # Wait for the banner to actually disappear, not a fixed 1s.
+                    await page.wait_for_function(
+                        "() => !document.querySelector('[class*=cookie] button, [id*=cookie] button')",
+                        timeout=1500,
+                    )
+                except Exception:
+                    pass
+
+            telegram_prompt_opened = bool(prepared.get("telegramOpened"))
+            if telegram_prompt_opened:
+                # The click either spawns a popup or hands off to the
+                # app; wait on the popup event rather than sleeping.
+                try:
+                    await page.wait_for_event("popup", timeout=1500)
+                except Exception:
+                    pass
 
             # --- Screenshot ---
             # We take a screenshot of the visible viewport (top of page with title/link)
             logger.debug(f"Taking screenshot: {screenshot_path}")
-            await self._hide_automation_banner(page)
             if self.capture_with_pyautogui:
                 page_title = await page.title()
-                if not self._capture_screen_with_pyautogui(screenshot_path, page_title):
+                # PyAutoGUI blocks for seconds (window activation + sleep);
+                # keep it off the event loop so other pages stay live.
+                captured = await asyncio.to_thread(
+                    self._capture_screen_with_pyautogui, screenshot_path, page_title
+                )
+                if not captured:
                     logger.debug("PyAutoGUI capture failed; falling back to Playwright viewport screenshot.")
                     await page.screenshot(path=screenshot_path, full_page=False)
             else:
@@ -573,37 +924,60 @@ class WebScraper:
 
             if self.capture_with_pyautogui and telegram_prompt_opened and self.interact_with_telegram:
                 telegram_screenshot_path = self._screenshot_path(url, "telegram")
-                if self._capture_telegram_app_window(telegram_screenshot_path):
-                    entry['telegram_screenshot_path'] = telegram_screenshot_path
+                if await asyncio.to_thread(self._capture_telegram_app_window, telegram_screenshot_path):
+                    entry['telegram_screenshot_path'] = str(telegram_screenshot_path)
 
             # --- Text Extraction ---
             logger.debug("Extracting structured text blocks...")
-            text_blocks = await self._collect_text_blocks(page)
-
-            if text_blocks:
-                if self.use_llm:
-                    logger.debug("Filtering blocks through the LLM...")
-                    filtered_blocks = await self._filter_blocks_with_llm(text_blocks, entry.get("title"))
-                else:
+            if self.use_llm:
+                text_blocks = await self._collect_text_blocks(page, top_for_llm=True)
+                if text_blocks:
+                    # Filtering happens after all scrapes finish, batched via
+                    # filter_entries_with_llm; keep the raw blocks around and
+                    # fill in the unfiltered text as an interim fallback.
+                    entry['raw_blocks'] = text_blocks
                     filtered_blocks = [block['text'] for block in text_blocks]
-
-                extracted_text = "\n\n".join(block for block in filtered_blocks if block)
-                entry['text_blocks'] = filtered_blocks
+                    extracted_text = "\n\n".join(block for block in filtered_blocks if block)
+                    entry['text_blocks'] = filtered_blocks
             else:
-                logger.debug("Falling back to raw HTML text extraction.")
-                content_html = await page.content()
-                soup = BeautifulSoup(content_html, 'html.parser')
-                
-                for script in soup(["script", "style", "nav", "footer"]):
-                    script.extract()
-
-                raw_text = soup.get_text(separator='\n')
-                lines = (line.strip() for line in raw_text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                extracted_text = '\n'.join(chunk for chunk in chunks if chunk)
-                entry['text_blocks'] = [raw_text]
+                joined_blocks = await self._collect_joined_text(page)
+                if joined_blocks:
+                    extracted_text = joined_blocks
+                    entry['text_blocks'] = [block for block in joined_blocks.split("\n\n") if block]
+
+            if not extracted_text:
+                # No structured blocks: try a cheap in-page extraction first
+                # so we don't serialize the entire DOM over CDP just to
+                # reparse it in Python.
+                logger.debug("Falling back to in-page text extraction.")
+                joined = ""
+                try:
+                    joined = await page.evaluate("() => window.__scraper.fallbackText()")
+                except Exception:
+                    logger.debug("In-page fallback extraction failed.")
+
+                if joined:
+                    extracted_text = joined
+                    entry['text_blocks'] = [joined]
+                else:
+                    logger.debug("Falling back to raw HTML text extraction.")
+                    content_html = await page.content()
+                    # lxml is C-accelerated; html.parser is pure Python and an
+                    # order of magnitude slower on big article pages.
+                    soup = BeautifulSoup(content_html, 'lxml')
+
+                    for script in soup(["script", "style", "nav", "footer"]):
+                        script.extract()
+
+                    raw_text = soup.get_text(separator='\n')
+                    lines = (line.strip() for line in raw_text.splitlines())
+                    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+                    extracted_text = '\n'.join(chunk for chunk in chunks if chunk)
+                    entry['text_blocks'] = [raw_text]
             
-            entry['screenshot_path'] = screenshot_path
+            # Entries cross the cache/writer boundary as JSON, so the Path
+            # becomes a string exactly once, here.
+            entry['screenshot_path'] = str(screenshot_path)
             entry['full_text'] = extracted_text
             entry['status'] = 'success'
             logger.info(f"Successfully processed {url}")
@@ -0,0 +1,31 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Click-tracking parameters that never change which article a URL points to.
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "igshid", "mc_cid", "mc_eid", "_openstat"})
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def canonicalize(url: str) -> str:
+    """
+    Canonical form of a URL for cache/dedup keys: lowercased scheme and
+    host, default ports and fragments dropped, tracking parameters
+    (utm_* and friends) removed, remaining query sorted, and no trailing
+    slash. News outlets routinely emit the same article with different UTM
+    tails, so keying on this form is what makes the caches actually hit.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and str(port) != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    query_pairs = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.startswith("utm_") and key not in _TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, netloc, parts.path.rstrip("/"), urlencode(query_pairs), ""))
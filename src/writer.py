@@ -1,20 +1,149 @@
-import os
+import copy
+import io
 import logging
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Optional
+
+if TYPE_CHECKING:
+    from docx.document import Document as DocumentObject
 
 logger = logging.getLogger(__name__)
 
+# python-docx pulls in a large slice of lxml and parses the default template
+# on import, so everything below is loaded lazily by _load_docx: module
+# import stays cheap and runs that never add an entry (preview mode) skip
+# the cost entirely.
+Document = None
+OxmlElement = None
+qn = None
+Composer = None
+
+# Prototypes for _add_multiline_paragraph, deep-copied per use. Building
+# from these skips the Paragraph/Run/style machinery python-docx spins up
+# on every add_paragraph call, which dominates writer CPU on text-heavy
+# reports. Lines within a block become <w:br/> breaks inside one <w:p> —
+# it renders identically but serializes a fraction of the nodes.
+_PARAGRAPH_PROTO = None
+_RUN_PROTO = None
+_BREAK_RUN_PROTO = None
+
+
+def _load_docx():
+    """
+    Imports python-docx (and docxcompose, if available) on first use and
+    builds the OXML prototypes and styling constants.
+    """
+    global Document, OxmlElement, qn, Composer
+    global _PARAGRAPH_PROTO, _RUN_PROTO, _BREAK_RUN_PROTO
+    if Document is not None:
+        return
+
+    from docx import Document as _Document
+    from docx.oxml import OxmlElement as _OxmlElement, parse_xml
+    from docx.oxml.ns import nsdecls, qn as _qn
+    from docx.shared import Inches, RGBColor
+    try:
+        from docxcompose.composer import Composer as _Composer
+    except ImportError:
+        _Composer = None
+
+    OxmlElement = _OxmlElement
+    qn = _qn
+    Composer = _Composer
+    _PARAGRAPH_PROTO = parse_xml(f'<w:p {nsdecls("w")}><w:pPr><w:jc w:val="left"/></w:pPr></w:p>')
+    _RUN_PROTO = parse_xml(f'<w:r {nsdecls("w")}><w:t xml:space="preserve"/></w:r>')
+    _BREAK_RUN_PROTO = parse_xml(f'<w:r {nsdecls("w")}><w:br/><w:t xml:space="preserve"/></w:r>')
+    # Shared styling values, computed once: Inches/RGBColor do EMU and
+    # channel math on every construction, which adds up across entries.
+    ReportGenerator._PIC_WIDTH = Inches(6.0)
+    ReportGenerator._URL_COLOR = RGBColor(0, 0, 255)
+    ReportGenerator._ERR_COLOR = RGBColor(255, 0, 0)
+    Document = _Document
+
+
+@contextmanager
+def _fast_zip_compression():
+    """
+    Temporarily defaults zipfile's deflate to level 1 while python-docx
+    serializes. The bulky archive members are JPEG/PNG screenshots that
+    deflate barely touches, so the default level 6 burns save-time CPU for
+    almost no size win. python-docx offers no compresslevel knob, hence the
+    scoped patch; the writer serializes from one thread at a time.
+    """
+    original = zipfile.ZipFile.__init__
+
+    def patched(self, *args, **kwargs):
+        kwargs.setdefault('compresslevel', 1)
+        original(self, *args, **kwargs)
+
+    zipfile.ZipFile.__init__ = patched
+    try:
+        yield
+    finally:
+        zipfile.ZipFile.__init__ = original
+
+
+def build_entry_doc(entry: Dict, page_break_before: bool = True) -> bytes:
+    """
+    Renders one entry into a standalone DOCX and returns its bytes. Free
+    function so ProcessPoolExecutor can pickle and fan it out; entries are
+    independent, making the CPU-heavy lxml/image work embarrassingly
+    parallel.
+    """
+    builder = ReportGenerator(output_file="")
+    builder._pending_page_break = page_break_before
+    builder.add_entry(entry)
+    buffer = io.BytesIO()
+    with _fast_zip_compression():
+        builder.doc.save(buffer)
+    return buffer.getvalue()
+
 class ReportGenerator:
+    # Styling constants, filled in by _load_docx alongside the imports.
+    _PIC_WIDTH = None
+    _URL_COLOR = None
+    _ERR_COLOR = None
+
+    # Screenshots render at 6 inches; anything wider than that at 150 dpi
+    # only inflates the DOCX, so embedded images are downscaled to this.
+    _PIC_TARGET_WIDTH = int(6.0 * 150)
+
+    # Entries per intermediate part file. Embedded screenshots otherwise sit
+    # in the element tree until save(), so RSS grows with the whole crawl;
+    # flushing every N entries caps it at roughly one chunk's worth.
+    _CHUNK_SIZE = 50
+
     def __init__(self, output_file="Report_Result.docx"):
         self.output_file = output_file
-        self.doc = Document()
+        # Created on first add_entry so zero-entry runs never parse the
+        # default template.
+        self.doc: Optional["DocumentObject"] = None
+        # Screenshot bytes by path: duplicate URLs reuse the same PNG, so
+        # read each file once and let python-docx dedupe the image part.
+        self._image_cache: Dict[str, bytes] = {}
+        # Intermediate part files, merged with docxcompose at save time.
+        # Without docxcompose everything stays in the single in-memory doc.
+        self._chunk_dir: Optional[Path] = None
+        self._chunk_paths: List[Path] = []
+        self._entries_in_doc = 0
+        # Page separation between entries: instead of an empty break
+        # paragraph after each entry, the next entry's first paragraph gets
+        # w:pageBreakBefore — same rendering, one less <w:p> per entry.
+        self._pending_page_break = False
+
+    def _ensure_doc(self):
+        if self.doc is None:
+            _load_docx()
+            self.doc = Document()
 
     def add_entry(self, entry: Dict):
+        self._ensure_doc()
         error_message = None
         if entry.get('status') == 'failed':
             error_message = entry.get('error') or 'Неизвестная ошибка'
@@ -25,33 +154,35 @@ class ReportGenerator:
         snippet = entry.get('snippet') or entry.get('original_snippet') or ''
         url_line = entry.get('url') or ''
 
-        self._add_preserved_paragraphs(source_line)
-        self._add_preserved_paragraphs(date_line)
+        self._add_multiline_paragraph(source_line)
+        self._add_multiline_paragraph(date_line)
         if snippet:
-            self._add_preserved_paragraphs(snippet)
+            self._add_multiline_paragraph(snippet)
         if url_line:
             paragraph = self.doc.add_paragraph(url_line)
             if paragraph.runs:
-                paragraph.runs[0].font.color.rgb = RGBColor(0, 0, 255)
+                paragraph.runs[0].font.color.rgb = self._URL_COLOR
                 paragraph.runs[0].underline = True
 
-        self._add_preserved_paragraphs("▌")
+        self._add_multiline_paragraph("▌")
 
         # 2. Screenshot
         telegram_path = entry.get('telegram_screenshot_path')
-        if telegram_path and os.path.exists(telegram_path):
+        telegram_data = self._image_bytes(telegram_path) if telegram_path else None
+        if telegram_data is not None:
             self.doc.add_paragraph("Telegram App Screenshot:")
             try:
-                self.doc.add_picture(telegram_path, width=Inches(6.0))
+                self.doc.add_picture(io.BytesIO(telegram_data), width=self._PIC_WIDTH)
             except Exception as e:
                 logger.error(f"Error inserting Telegram image {telegram_path}: {e}")
                 self.doc.add_paragraph(f"[Error inserting Telegram image: {e}]")
 
         screenshot_path = entry.get('screenshot_path')
-        if screenshot_path and os.path.exists(screenshot_path):
+        screenshot_data = self._image_bytes(screenshot_path, as_jpeg=True) if screenshot_path else None
+        if screenshot_data is not None:
             self.doc.add_paragraph("Article Screenshot:")
             try:
-                self.doc.add_picture(screenshot_path, width=Inches(6.0))
+                self.doc.add_picture(io.BytesIO(screenshot_data), width=self._PIC_WIDTH)
             except Exception as e:
                 logger.error(f"Error inserting image {screenshot_path}: {e}")
                 self.doc.add_paragraph(f"[Error inserting image: {e}]")
@@ -63,35 +194,109 @@ class ReportGenerator:
         content_blocks = entry.get('text_blocks')
         if content_blocks:
             for block in content_blocks:
-                self._add_preserved_paragraphs(block)
+                self._add_multiline_paragraph(block)
         else:
             snippet = entry.get('snippet')
             if snippet:
-                self._add_preserved_paragraphs(snippet)
+                self._add_multiline_paragraph(snippet)
             else:
                 text_content = entry.get('full_text', '')
-                self._add_preserved_paragraphs(text_content)
+                self._add_multiline_paragraph(text_content)
         
         # Error message if there was a failure
         if error_message:
             err_para = self.doc.add_paragraph(f"Ошибка обработки: {error_message}. Не удалось получить все данные.")
-            err_para.runs[0].font.color.rgb = RGBColor(255, 0, 0)
+            err_para.runs[0].font.color.rgb = self._ERR_COLOR
             err_para.runs[0].font.bold = True
 
         # Page Break between entries for cleanliness
-        self.doc.add_page_break()
+        self._pending_page_break = True
+
+        self._entries_in_doc += 1
+        if Composer is not None and self._entries_in_doc >= self._CHUNK_SIZE:
+            self._flush_chunk()
+
+    def add_entries_parallel(self, entries: List[Dict], max_workers: Optional[int] = None):
+        """
+        Renders entries as per-entry sub-documents across worker processes
+        and queues the results as part files for the docxcompose merge in
+        save(). Worth it for bulk rebuilds (e.g. a fully cached run); the
+        scraping pipeline keeps using add_entry, which overlaps writer work
+        with browser I/O as results stream in.
+        """
+        _load_docx()
+        if Composer is None or len(entries) < 2:
+            for entry in entries:
+                self.add_entry(entry)
+            return
+        if self._entries_in_doc:
+            self._flush_chunk()
+        if self._chunk_dir is None:
+            self._chunk_dir = Path(tempfile.mkdtemp(prefix="report_parts_"))
+        # The first part opens the document, so only later ones break first.
+        break_flags = [index > 0 or bool(self._chunk_paths) for index in range(len(entries))]
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for data in pool.map(build_entry_doc, entries, break_flags, chunksize=8):
+                part_path = self._chunk_dir / f"part_{len(self._chunk_paths):04d}.docx"
+                part_path.write_bytes(data)
+                self._chunk_paths.append(part_path)
+
+    def _flush_chunk(self):
+        """
+        Saves the accumulated entries to an intermediate part file and starts
+        a fresh document, releasing the element tree and embedded images.
+        """
+        if self._chunk_dir is None:
+            self._chunk_dir = Path(tempfile.mkdtemp(prefix="report_parts_"))
+        part_path = self._chunk_dir / f"part_{len(self._chunk_paths):04d}.docx"
+        buffer = io.BytesIO()
+        with _fast_zip_compression():
+            self.doc.save(buffer)
+        part_path.write_bytes(buffer.getbuffer())
+        self._chunk_paths.append(part_path)
+        self.doc = Document()
+        self._entries_in_doc = 0
+
+    def _serialize(self) -> io.BytesIO:
+        """
+        Final document bytes: either the single in-memory doc, or the part
+        files merged in order via docxcompose.
+        """
+        if self._chunk_paths:
+            if self._entries_in_doc:
+                self._flush_chunk()
+            base = Document(str(self._chunk_paths[0]))
+            composer = Composer(base)
+            for part in self._chunk_paths[1:]:
+                composer.append(Document(str(part)))
+            buffer = io.BytesIO()
+            with _fast_zip_compression():
+                base.save(buffer)
+            shutil.rmtree(self._chunk_dir, ignore_errors=True)
+            self._chunk_dir = None
+            self._chunk_paths = []
+            return buffer
+        self._ensure_doc()
+        buffer = io.BytesIO()
+        with _fast_zip_compression():
+            self.doc.save(buffer)
+        return buffer
 
     def save(self):
         target_path = Path(self.output_file)
+        # Serialize the DOCX (a ZIP of many small entries) into memory first,
+        # then hit the filesystem with one bulk write instead of a syscall
+        # per archive member.
+        buffer = self._serialize()
         try:
-            self.doc.save(target_path)
+            target_path.write_bytes(buffer.getbuffer())
             logger.info(f"💾 Report saved to {self.output_file}")
         except PermissionError as exc:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             fallback_name = f"Report_Result_{timestamp}.docx"
             fallback_path = target_path.parent / fallback_name if target_path.parent else Path(fallback_name)
             try:
-                self.doc.save(fallback_path)
+                fallback_path.write_bytes(buffer.getbuffer())
                 logger.warning(
                     f"Permission denied writing {self.output_file} ({exc}). "
                     f"Saved report to fallback {fallback_path} instead."
@@ -99,13 +304,82 @@ class ReportGenerator:
             except Exception as inner_exc:
                 logger.error(f"Unable to save report to fallback location: {inner_exc}")
 
-    def _add_preserved_paragraphs(self, text: str):
+    def _image_bytes(self, path: str, as_jpeg: bool = False) -> Optional[bytes]:
         """
-        Adds paragraphs exactly as the text contains them so we keep the original layout.
+        Reads image bytes through the per-path cache, downscaled to the
+        report's render width. The open doubles as the existence check, so
+        missing screenshots cost no separate stat.
+        """
+        data = self._image_cache.get(path)
+        if data is None:
+            try:
+                data = self._prepare_image(path, as_jpeg=as_jpeg)
+            except OSError:
+                return None
+            self._image_cache[path] = data
+        return data
+
+    def _prepare_image(self, path: str, as_jpeg: bool = False) -> bytes:
+        """
+        Screenshot bytes ready for embedding: captures wider than the
+        6-inch render width are thumbnailed down, and with `as_jpeg`
+        photographic article screenshots are re-encoded as JPEG — several
+        times smaller than PNG with no further deflate work at save time.
+        Telegram captures stay PNG so UI text remains lossless.
+        """
+        try:
+            from PIL import Image
+        except ImportError:
+            return Path(path).read_bytes()
+        try:
+            with Image.open(path) as image:
+                if not as_jpeg and image.width <= self._PIC_TARGET_WIDTH:
+                    return Path(path).read_bytes()
+                if image.width > self._PIC_TARGET_WIDTH:
+                    image.thumbnail((self._PIC_TARGET_WIDTH, 10_000), Image.LANCZOS)
+                buffer = io.BytesIO()
+                if as_jpeg:
+                    image.convert('RGB').save(buffer, format='JPEG', quality=82, optimize=True, progressive=True)
+                else:
+                    image.save(buffer, format='PNG', optimize=True)
+                return buffer.getvalue()
+        except OSError:
+            raise
+        except Exception as exc:
+            logger.debug(f"Could not re-encode image {path}: {exc}")
+            return Path(path).read_bytes()
+
+    def _add_multiline_paragraph(self, text: str):
+        """
+        Adds text exactly as laid out in the source: one paragraph per block,
+        with <w:br/> line breaks standing in for the newlines. Appends
+        prebuilt OXML straight onto the body rather than going through
+        doc.add_paragraph for every line.
         """
         if not text:
             return
 
-        for line in text.split('\n'):
-            paragraph = self.doc.add_paragraph(line)
-            paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        paragraph = copy.deepcopy(_PARAGRAPH_PROTO)
+        if self._pending_page_break:
+            # pageBreakBefore precedes jc in the pPr content model.
+            paragraph[0].insert(0, OxmlElement('w:pageBreakBefore'))
+            self._pending_page_break = False
+        if '\n' not in text:
+            # Single-line fast path: source/date/URL fields are the common
+            # case and don't need the split allocation.
+            run = copy.deepcopy(_RUN_PROTO)
+            run[-1].text = text
+            paragraph.append(run)
+        else:
+            for i, line in enumerate(text.split('\n')):
+                run = copy.deepcopy(_RUN_PROTO if i == 0 else _BREAK_RUN_PROTO)
+                run[-1].text = line  # the run's <w:t>
+                paragraph.append(run)
+
+        body = self.doc.element.body
+        # The trailing sectPr must stay last or Word rejects the document.
+        sect_pr = body.find(qn('w:sectPr'))
+        if sect_pr is not None:
+            sect_pr.addprevious(paragraph)
+        else:
+            body.append(paragraph)